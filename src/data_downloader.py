@@ -7,33 +7,53 @@ as a standalone program to download data by providing command-line arguments.
 """
 
 import argparse
+import asyncio
 import logging
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
 
-import requests
+import httpx
 
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
+# httpx logs every request at INFO; the downloader already logs each file
+logging.getLogger("httpx").setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
 
 class GHArchiveDownloader:
     """A downloader for GitHub Archive data files."""
     
     BASE_URL = "https://data.gharchive.org"
+    CHUNK_SIZE = 65536
+    MONITOR_INTERVAL = 5  # seconds between concurrency adjustments
+    SMOOTHING_INTERVALS = 3  # monitor intervals averaged into the throughput estimate
+    IDLE_WORKER_SLEEP = 0.5  # seconds an idle worker waits before checking again
+    REQUEST_TIMEOUT = (5, 30)  # (connect, read) timeouts in seconds
+    CONNECT_RETRIES = 3  # attempts to retry a connection that fails to open
     
-    def __init__(self, output_dir):
+    def __init__(self, output_dir, max_concurrency=32, min_concurrency=2):
         """
         Initialize the downloader with the specified output directory.
 
         Args:
             output_dir (str): The directory where downloaded files will be saved.
+            max_concurrency (int): The maximum number of files downloaded at the same time
+                by `download_date_range`.
+            min_concurrency (int): The minimum number of files downloaded at the same time
+                by `download_date_range`.
         """
         self.DOWNLOAD_DIR = output_dir
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self._target_workers = min_concurrency
+        self._interval_bytes = 0
         # Create download directory if it doesn't exist
         Path(self.DOWNLOAD_DIR).mkdir(parents=True, exist_ok=True)
     
@@ -41,7 +61,40 @@ class GHArchiveDownloader:
         """
         Download a single file for a specific date and hour.
 
+        The file is fetched with the same HTTP client setup as `download_date_range`,
+        over a connection opened for this call only. To download many files, use
+        `download_date_range`, whose concurrent downloads share their connections.
+
+        Args:
+            date_str (str): The date and hour in the format 'YYYY-MM-DD-H'.
+
+        Returns:
+            bool: True if the file was downloaded successfully or already exists, False otherwise.
+        """
+        return _run(self._download_file_with_new_client(date_str))
+
+    async def _download_file_with_new_client(self, date_str):
+        """
+        Download a single file with a client of its own. See `download_file`.
+
+        Args:
+            date_str (str): The date and hour in the format 'YYYY-MM-DD-H'.
+
+        Returns:
+            bool: True if the file was downloaded successfully or already exists, False otherwise.
+        """
+        async with self._client() as client:
+            return await self.download_file_async(client, date_str)
+
+    async def download_file_async(self, client, date_str):
+        """
+        Asynchronously download a single file for a specific date and hour.
+
+        The bytes received are counted as each chunk arrives so that the
+        concurrency controller can estimate the current throughput.
+
         Args:
+            client (httpx.AsyncClient): The shared HTTP client used for the request.
             date_str (str): The date and hour in the format 'YYYY-MM-DD-H'.
 
         Returns:
@@ -50,31 +103,249 @@ class GHArchiveDownloader:
         filename = f"{date_str}.json.gz"
         url = f"{self.BASE_URL}/{filename}"
         output_path = os.path.join(self.DOWNLOAD_DIR, filename)
-        
-        # Check if file already exists
-        if os.path.exists(output_path):
+
+        if await self._has_complete_copy(client, url, output_path):
             logger.info(f"File already exists, skipping: {filename}")
             return True
-            
+
         try:
-            response = requests.get(url, stream=True)
-            response.raise_for_status()  # Raise an exception for HTTP errors
-            
-            with open(output_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            
+            async with client.stream("GET", url) as response:
+                response.raise_for_status()  # Raise an exception for HTTP errors
+
+                with self._part_file(output_path) as f:
+                    async for chunk in response.aiter_bytes(self.CHUNK_SIZE):
+                        f.write(chunk)
+                        self._interval_bytes += len(chunk)
+
             logger.info(f"Successfully downloaded: {filename}")
             return True
-            
-        except requests.exceptions.RequestException as e:
+
+        except httpx.HTTPError as e:
             logger.error(f"Failed to download {filename}: {str(e)}")
             return False
+
+    async def _has_complete_copy(self, client, url, output_path):
+        """
+        Check whether a file was already downloaded in full.
+
+        An existing file is only kept if its size matches the remote file, so that
+        truncated files, e.g. from an interrupted earlier run, are fetched again.
+
+        Args:
+            client (httpx.AsyncClient): The HTTP client used for the HEAD request.
+            url (str): The URL of the remote file.
+            output_path (str): The path of the local file.
+
+        Returns:
+            bool: True if the local file exists and is complete, False otherwise.
+        """
+        if not os.path.exists(output_path):
+            return False
+        if self._is_complete(output_path, await self._remote_size(client, url)):
+            return True
+        logger.info(f"File is incomplete, downloading again: {os.path.basename(output_path)}")
+        return False
+
+    @staticmethod
+    @contextmanager
+    def _part_file(output_path):
+        """
+        Open a temporary `.part` file that replaces `output_path` once fully written.
+
+        The data is flushed to disk before the rename, and the `.part` file is removed
+        if writing fails, so an interrupted download never looks complete.
+
+        Args:
+            output_path (str): The final path of the file.
+
+        Yields:
+            BinaryIO: The open `.part` file.
+        """
+        part_path = output_path + ".part"
+        try:
+            with open(part_path, 'wb') as f:
+                yield f
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(part_path, output_path)
+        finally:
+            if os.path.exists(part_path):
+                os.unlink(part_path)
+
+    async def _remote_size(self, client, url):
+        """
+        Asynchronously get the size of a remote file from the Content-Length of a HEAD request.
+
+        Args:
+            client (httpx.AsyncClient): The shared HTTP client used for the request.
+            url (str): The URL of the remote file.
+
+        Returns:
+            int | None: The size in bytes, or None if it cannot be determined.
+        """
+        try:
+            response = await client.head(url)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not get the size of {url}: {str(e)}")
+            return None
+        return self._content_length(response.headers)
+
+    @staticmethod
+    def _content_length(headers):
+        """
+        Get the size of the file body from the response headers.
+
+        The Content-Length of an encoded response is the size of the encoded body,
+        not of the file written to disk, so it is ignored in that case.
+
+        Args:
+            headers (Mapping[str, str]): The response headers.
+
+        Returns:
+            int | None: The size in bytes, or None if it cannot be determined.
+        """
+        if "Content-Encoding" in headers or "Content-Length" not in headers:
+            return None
+        return int(headers["Content-Length"])
+
+    @staticmethod
+    def _is_complete(output_path, remote_size):
+        """
+        Check whether a local file matches the size of the remote file.
+
+        Args:
+            output_path (str): The path of the local file.
+            remote_size (int | None): The size of the remote file, None if unknown.
+
+        Returns:
+            bool: True if the sizes match or the remote size is unknown, False otherwise.
+        """
+        return remote_size is None or os.path.getsize(output_path) == remote_size
+
+    def _client(self):
+        """
+        Create the HTTP/2 client used for the downloads.
+
+        The client follows redirects and retries failed connection attempts
+        `CONNECT_RETRIES` times.
+
+        Returns:
+            httpx.AsyncClient: A client allowing up to `max_concurrency` connections.
+        """
+        limits = httpx.Limits(max_connections=self.max_concurrency)
+        connect_timeout, read_timeout = self.REQUEST_TIMEOUT
+        timeout = httpx.Timeout(read_timeout, connect=connect_timeout, pool=None)
+        # HTTP/2 and the limits are transport settings once a transport is given
+        transport = httpx.AsyncHTTPTransport(http2=True, limits=limits, retries=self.CONNECT_RETRIES)
+        return httpx.AsyncClient(transport=transport, timeout=timeout, follow_redirects=True)
+
+    async def _worker(self, index, client, queue, failed_downloads):
+        """
+        Download files from the queue until it is empty.
+
+        A worker whose index is not below the current target number of workers
+        stays idle until the controller raises the target again.
+
+        Args:
+            index (int): The position of this worker in the pool.
+            client (httpx.AsyncClient): The shared HTTP client used for the requests.
+            queue (asyncio.Queue): The dates and hours still to be downloaded.
+            failed_downloads (list[str]): Collects the dates and hours whose download failed.
+        """
+        while not queue.empty():
+            if index >= self._target_workers:
+                await asyncio.sleep(self.IDLE_WORKER_SLEEP)
+                continue
+
+            date_str = queue.get_nowait()
+            if not await self.download_file_async(client, date_str):
+                failed_downloads.append(date_str)
+
+    async def _adjust_concurrency(self):
+        """
+        Periodically adjust the target number of workers to track the maximum throughput.
+
+        Every `MONITOR_INTERVAL` seconds the bytes received during the interval are
+        turned into a throughput, averaged over the last `SMOOTHING_INTERVALS`
+        intervals, and compared with the previous average. The controller keeps
+        moving the target in the same direction while throughput improves and
+        reverses it otherwise, staying between `min_concurrency` and `max_concurrency`.
+        """
+        recent_throughputs = deque(maxlen=self.SMOOTHING_INTERVALS)
+        previous_throughput = 0.0
+        step = 1
+
+        while True:
+            await asyncio.sleep(self.MONITOR_INTERVAL)
+
+            recent_throughputs.append(self._interval_bytes / self.MONITOR_INTERVAL / 1e6)
+            self._interval_bytes = 0
+            throughput = sum(recent_throughputs) / len(recent_throughputs)
+
+            if throughput < previous_throughput:
+                step = -step
+            previous_throughput = throughput
+
+            self._target_workers = max(
+                self.min_concurrency,
+                min(self.max_concurrency, self._target_workers + step)
+            )
+            logger.info(f"Throughput {throughput:.2f} MB/s, using {self._target_workers} concurrent downloads")
+
+    async def _download_all(self, date_strs):
+        """
+        Download all the given files with an adaptive pool of workers sharing an HTTP/2 client.
+
+        With HTTP/2 the concurrent requests are multiplexed as streams over the same
+        connection instead of each needing its own TCP and TLS connection.
+
+        Args:
+            date_strs (list[str]): Dates and hours in the format 'YYYY-MM-DD-H'.
+
+        Returns:
+            list[str]: The dates and hours whose download failed.
+        """
+        queue = asyncio.Queue()
+        for date_str in date_strs:
+            queue.put_nowait(date_str)
+
+        failed_downloads = []
+        self._target_workers = self.min_concurrency
+        self._interval_bytes = 0
+
+        async with self._client() as client:
+            controller = asyncio.ensure_future(self._adjust_concurrency())
+            try:
+                await asyncio.gather(*[
+                    self._worker(index, client, queue, failed_downloads)
+                    for index in range(self.max_concurrency)
+                ])
+            finally:
+                controller.cancel()
+
+        return failed_downloads
     
     def download_date_range(self, start_date, end_date):
         """
         Download files for a range of dates and hours.
 
+        The number of files downloaded at the same time starts at `min_concurrency`
+        and is adjusted between `min_concurrency` and `max_concurrency` to follow
+        the observed throughput. This also works where an event loop is already
+        running, e.g. in Jupyter, but `await download_date_range_async` is preferred there.
+
+        Args:
+            start_date (str): The start date in 'YYYY-MM-DD' format.
+            end_date (str): The end date in 'YYYY-MM-DD' format.
+        """
+        _run(self.download_date_range_async(start_date, end_date))
+
+    async def download_date_range_async(self, start_date, end_date):
+        """
+        Asynchronously download files for a range of dates and hours.
+        See `download_date_range`.
+
         Args:
             start_date (str): The start date in 'YYYY-MM-DD' format.
             end_date (str): The end date in 'YYYY-MM-DD' format.
@@ -82,21 +353,42 @@ class GHArchiveDownloader:
         start = datetime.strptime(start_date, "%Y-%m-%d")
         end = datetime.strptime(end_date, "%Y-%m-%d")
         
-        failed_downloads = []
+        date_strs = []
         current_date = start
         
         while current_date <= end:
             for hour in range(24):  # Iterate through all 24 hours
-                date_str = current_date.strftime("%Y-%m-%d") + f"-{hour}"
-                if not self.download_file(date_str):
-                    failed_downloads.append(date_str)
+                date_strs.append(current_date.strftime("%Y-%m-%d") + f"-{hour}")
             current_date += timedelta(days=1)
+
+        failed_downloads = await self._download_all(date_strs)
         
         if failed_downloads:
             logger.warning(f"Failed to download files for the following dates and hours: {', '.join(failed_downloads)}")
         else:
             logger.info("All files downloaded successfully!")
 
+def _run(coroutine):
+    """
+    Run a coroutine to completion from synchronous code and return its result.
+
+    If the calling thread already runs an event loop, as in Jupyter, the coroutine
+    runs in a separate thread with its own event loop, since asyncio.run would fail.
+
+    Args:
+        coroutine (Coroutine): The coroutine to run.
+
+    Returns:
+        Any: The result of the coroutine.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
 def main():
     """
     Parse command-line arguments and initiate the download process.
@@ -105,12 +397,18 @@ def main():
     parser.add_argument('--start-date', required=True, help='Start date in YYYY-MM-DD format')
     parser.add_argument('--end-date', required=True, help='End date in YYYY-MM-DD format')
     parser.add_argument('--output-dir', default='data/raw', help='Output directory for downloaded files')
+    parser.add_argument('--max-concurrency', type=int, default=32, help='Maximum number of concurrent downloads')
+    parser.add_argument('--min-concurrency', type=int, default=2, help='Minimum number of concurrent downloads')
     
     args = parser.parse_args()
     
-    downloader = GHArchiveDownloader(args.output_dir)
+    downloader = GHArchiveDownloader(
+        args.output_dir,
+        max_concurrency=args.max_concurrency,
+        min_concurrency=args.min_concurrency
+    )
     logger.info(f"Starting download from {args.start_date} to {args.end_date}")
-    downloader.download_date_range(args.start_date, args.end_date)
+    asyncio.run(downloader.download_date_range_async(args.start_date, args.end_date))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
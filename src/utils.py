@@ -6,7 +6,7 @@ This script provides utility functions for processing CSV data into Polars DataF
 performing data transformations, generating graphs using NetworkX, and exporting the results.
 
 Key functionalities include:
-- Reading CSV files into Polars DataFrames
+- Reading or lazily scanning CSV files into Polars DataFrames
 - Processing data to calculate actor pairs and monthly statistics
 - Creating and exporting NetworkX graphs
 
@@ -19,39 +19,58 @@ Usage:
         processed_df = process_dataframe(df)
         graph = create_graph_from_dataframe(processed_df)
         export_graph(graph, "output.graphml")
+
+    Daily event counts of a whole directory, streamed in batches:
+        df = daily_event_count(scan_csvs_from_dir("data/gharchive")).collect(engine="streaming")
 """
 
-from typing import Optional, List, Tuple, Dict
+from typing import Optional, List, Tuple, Dict, TypeVar, Union
 import os
-from datetime import datetime
+import pickle
 from glob import glob
+import numpy as np
 import polars as pl
 import networkx as nx
-import dcor  # type: ignore
+import igraph as ig  # type: ignore
+from numba import njit, prange  # type: ignore
+from joblib import Parallel, delayed  # type: ignore
 
-def _parse_mixed_datetime(dt_str):
-    datetime_formats = [
-        "%Y-%m-%d %H:%M:%S",
-        "%Y-%m-%dT%H:%M:%S%z",  # Handles ISO8601 with timezone, e.g., 2014-09-08T11:55:49-07:00
-        "%Y/%m/%d %H:%M:%S %z",  # Handles e.g., 2012/05/01 10:25:30 -0700
-    ]
-    for fmt in datetime_formats:
-        try:
-            return datetime.strptime(dt_str, fmt).date()
-        except (ValueError, TypeError):
-            continue
-    return None
+FrameT = TypeVar("FrameT", pl.DataFrame, pl.LazyFrame)
+
+# Formats found in the event_date column of the GitHub Archive CSV exports
+_DATETIME_FORMATS = [
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S%z",  # Handles ISO8601 with timezone, e.g., 2014-09-08T11:55:49-07:00
+    "%Y-%m-%dT%H:%M:%SZ",  # Handles ISO8601 in UTC, e.g., 2014-09-08T11:55:49Z
+    "%Y/%m/%d %H:%M:%S %z",  # Handles e.g., 2012/05/01 10:25:30 -0700
+]
 
-def read_csv_to_polars(file_path: str) -> pl.DataFrame:
+def _parse_mixed_datetime(column: str) -> pl.Expr:
     """
-    Read a CSV file into a Polars DataFrame with a specified schema.
+    Build an expression parsing a string column into a date, trying each of
+    _DATETIME_FORMATS in turn. Values matching none of them become null.
+
+    Args:
+        column (str): Name of the string column to parse
+
+    Returns:
+        pl.Expr: Expression evaluating to the parsed pl.Date column
+    """
+    return pl.coalesce([
+        pl.col(column).str.to_date(fmt, strict=False)
+        for fmt in _DATETIME_FORMATS
+    ])
+
+def scan_csv_to_polars(file_path: Union[str, List[str]]) -> pl.LazyFrame:
+    """
+    Lazily scan one or more CSV files into a Polars LazyFrame with a specified schema.
     Adds a new 'event_date' column parsed from 'event_date_str' using _parse_mixed_datetime.
     
     Args:
-        file_path (str): Path to the CSV file
+        file_path (str | list[str]): Path to the CSV file, or list of paths scanned as one
         
     Returns:
-        pl.DataFrame: The loaded DataFrame
+        pl.LazyFrame: The LazyFrame scanning the file
     """
     schema = {
         "repository": pl.Utf8,
@@ -61,69 +80,116 @@ def read_csv_to_polars(file_path: str) -> pl.DataFrame:
         "actor_id": pl.Utf8,
         "object_id": pl.Utf8,
     }
-    df = pl.read_csv(
+    lf = pl.scan_csv(
         file_path,
         has_header=False,
         try_parse_dates=False,
         separator=",",
         encoding="utf8",
-        infer_schema_length=1000,
-        new_columns=list(schema.keys()),
         schema=schema
     )
 
-    df = df.with_columns(
-        pl.col("event_date_str").map_elements(_parse_mixed_datetime, return_dtype=pl.Date).alias("event_date")
+    lf = lf.with_columns(
+        _parse_mixed_datetime("event_date_str").alias("event_date")
     ).drop("event_date_str")
 
-    df = df.with_columns(
+    lf = lf.with_columns(
         pl.when(pl.col("object_type").str.to_lowercase().str.starts_with("issue"))
         .then(pl.lit("issue"))
         .otherwise(pl.lit("pr"))
         .alias("object_type")
     )
     
-    return df
+    return lf
 
-def read_and_concat_csvs_from_dir(
+def read_csv_to_polars(file_path: str, columns: Optional[List[str]] = None) -> pl.DataFrame:
+    """
+    Read a CSV file into a Polars DataFrame with a specified schema.
+    See scan_csv_to_polars for the transformations applied.
+    
+    Args:
+        file_path (str): Path to the CSV file
+        columns (list[str], optional): Columns to keep. Others are skipped while parsing the file. If None, keep all.
+        
+    Returns:
+        pl.DataFrame: The loaded DataFrame
+    """
+    lf = scan_csv_to_polars(file_path)
+    if columns is not None:
+        lf = lf.select(columns)
+    return lf.collect()
+
+def scan_csvs_from_dir(
     directory: str,
     repositories: Optional[list[str]] = None
+) -> pl.LazyFrame:
+    """
+    Lazily scan all CSV files from a directory as a single LazyFrame, optionally filtered
+    for only the specified repositories.
+
+    Nothing is read until the LazyFrame is collected. Collecting it, or a query built on it
+    such as daily_event_count, with engine="streaming" processes the files in batches, so
+    peak memory does not grow with the total size of the files.
+
+    Args:
+        directory (str): Path to the directory containing CSV files.
+        repositories (list[str], optional): List of repository names to include. If None, include all.
+
+    Returns:
+        pl.LazyFrame: LazyFrame over all the files, optionally filtered by repositories.
+    """
+    csv_files = glob(os.path.join(directory, "*.csv.gz"))
+    if not csv_files:
+        return pl.LazyFrame([])
+    lf = scan_csv_to_polars(csv_files)
+    if repositories is not None:
+        lf = lf.filter(pl.col("repository").is_in(repositories))
+    return lf
+
+def read_and_concat_csvs_from_dir(
+    directory: str,
+    repositories: Optional[list[str]] = None,
+    columns: Optional[list[str]] = None
 ) -> pl.DataFrame:
     """
     Read all CSV files from a directory, optionally filter for only the specified repositories,
     and concatenate the records into a single DataFrame.
 
+    The files are scanned lazily with scan_csvs_from_dir and collected once with the
+    streaming engine, so rows of other repositories are never materialized. To aggregate
+    the records without materializing them all, pass scan_csvs_from_dir to
+    daily_event_count instead.
+
     Args:
         directory (str): Path to the directory containing CSV files.
         repositories (list[str], optional): List of repository names to include. If None, include all.
+        columns (list[str], optional): Columns to keep, e.g., only those daily_event_count needs.
+            The others are never materialized. If None, keep all.
 
     Returns:
         pl.DataFrame: Concatenated DataFrame, optionally filtered by repositories.
     """
-    csv_files = glob(os.path.join(directory, "*.csv.gz"))
-    dfs = []
-    for file in csv_files:
-        df = read_csv_to_polars(file)
-        if repositories is not None:
-            df = df.filter(pl.col("repository").is_in(repositories))
-        dfs.append(df)
-    if dfs:
-        return pl.concat(dfs)
-    else:
-        return pl.DataFrame([])
+    lf = scan_csvs_from_dir(directory, repositories)
+    # Without any file the scan is an empty LazyFrame, which has no columns to select
+    if columns is not None and glob(os.path.join(directory, "*.csv.gz")):
+        lf = lf.select(columns)
+    return lf.collect(engine="streaming")
 
 def daily_event_count(
-    df: pl.DataFrame
-) -> pl.DataFrame:
+    df: FrameT
+) -> FrameT:
     """
     Given a DataFrame, return a DataFrame with daily_event_count grouped by
     event_date, actor_id, object_id, and object_type.
 
+    A LazyFrame (e.g., from scan_csvs_from_dir) gives back a LazyFrame, which can be
+    collected with engine="streaming" to count the events of large inputs in batches.
+
     Args:
-        df (pl.DataFrame): Input DataFrame (e.g., from read_and_concat_csvs_from_dir)
+        df (pl.DataFrame | pl.LazyFrame): Input DataFrame (e.g., from read_and_concat_csvs_from_dir)
 
     Returns:
-        pl.DataFrame: Grouped DataFrame with daily_event_count
+        pl.DataFrame | pl.LazyFrame: Grouped DataFrame with daily_event_count
     """
     return (
         df.group_by(["event_date", "actor_id", "object_id", "object_type"])
@@ -134,12 +200,22 @@ def daily_event_count(
 def export_graph(graph: nx.Graph, output_path: str) -> None:
     """
     Export a NetworkX graph to a file.
+
+    Paths ending in .graphml are written as GraphML with the incremental lxml
+    writer, which streams the elements to the file instead of building the
+    whole XML document in memory; .graphml.gz and .graphml.bz2 are compressed
+    on the fly. Any other path gets a pickle of the graph, which is much faster
+    to write and read back for internal use.
     
     Args:
         graph (nx.Graph): The graph to export
         output_path (str): Path where to save the graph
     """
-    nx.write_graphml(graph, output_path)
+    if output_path.lower().endswith((".graphml", ".graphml.gz", ".graphml.bz2")):
+        nx.write_graphml_lxml(graph, output_path)
+    else:
+        with open(output_path, "wb") as f:
+            pickle.dump(graph, f, protocol=5)
 
 
 def process_csv(input_file: str) -> pl.DataFrame:
@@ -155,40 +231,169 @@ def process_csv(input_file: str) -> pl.DataFrame:
 
     return df
 
+@njit(parallel=True, cache=True)
+def _emit_pair_indices(offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Emit the positions (i, j), i < j, of every pair of rows within each group of rows.
+
+    Args:
+        offsets (np.ndarray): Start of each group of rows, followed by the total number of rows.
+
+    Returns:
+        Tuple of arrays (group, i, j), one element per pair.
+    """
+    n_groups = offsets.shape[0] - 1
+
+    # Number of pairs before each group, to allocate the output once
+    pair_offsets = np.zeros(n_groups + 1, dtype=np.int64)
+    for g in range(n_groups):
+        k = offsets[g + 1] - offsets[g]
+        pair_offsets[g + 1] = pair_offsets[g] + k * (k - 1) // 2
+
+    n_pairs = pair_offsets[n_groups]
+    group = np.empty(n_pairs, dtype=np.int64)
+    first = np.empty(n_pairs, dtype=np.int64)
+    second = np.empty(n_pairs, dtype=np.int64)
+
+    # Each group writes to its own slice of the output
+    for g in prange(n_groups):
+        p = pair_offsets[g]
+        for i in range(offsets[g], offsets[g + 1]):
+            for j in range(i + 1, offsets[g + 1]):
+                group[p] = g
+                first[p] = i
+                second[p] = j
+                p += 1
+
+    return group, first, second
+
+# Number of distinct UInt32 object codes, the multiplier of the date in the packed group key
+_OBJECT_KEY_SPAN = 1 << 32
+
 def _create_actor_pairs_by_date_and_object(df: pl.DataFrame) -> pl.DataFrame:
+    """
+    Create all pairs of distinct actors with events on the same object on the same date.
+    Each pair is emitted with actor_id < actor_id_2, and total_daily_event_count is the
+    sum of both actors' daily_event_count.
 
-    # Create all possible actor pairs for each date and object
-    actor_pairs = df.join(
-        df,
-        on=["event_date", "object_id"],
-        how="inner",
-        suffix="_2"
-    ).filter(
-        pl.col("actor_id") < pl.col("actor_id_2")  # Avoid duplicate pairs (A,B) and (B,A)
+    Rather than self-joining the DataFrame and discarding more than half of the joined
+    rows, the actors of each (event_date, object_id) are collected with a group by and
+    _emit_pair_indices generates each unordered pair of rows exactly once. Groups with a
+    single actor, the majority, are dropped before any pair is generated.
+    
+    Args:
+        df (pl.DataFrame): DataFrame with event_date, object_id, actor_id and daily_event_count columns
+        
+    Returns:
+        pl.DataFrame: DataFrame with event_date, object_id, actor_id, actor_id_2 and total_daily_event_count columns
+    """
+    # Rows with a null key would not have matched any other row in a join
+    df = df.drop_nulls(["event_date", "object_id", "actor_id"])
+
+    if df.schema["object_id"] == pl.UInt32 and df.schema["event_date"] == pl.Date:
+        # Integer object codes, as from prepare_df_to_graph, are packed with the Int32 days
+        # of a Date into a single Int64 key, which is cheaper to hash than the two columns
+        groups = df.group_by(
+            (pl.col("event_date").cast(pl.Int64) * _OBJECT_KEY_SPAN + pl.col("object_id")).alias("key")
+        ).agg(
+            ["actor_id", "daily_event_count"]
+        ).filter(
+            pl.col("actor_id").list.len() > 1
+        ).select([
+            pl.col("key").floordiv(_OBJECT_KEY_SPAN).cast(pl.Int32).cast(pl.Date).alias("event_date"),
+            (pl.col("key") - pl.col("key").floordiv(_OBJECT_KEY_SPAN) * _OBJECT_KEY_SPAN).cast(pl.UInt32).alias("object_id"),
+            "actor_id",
+            "daily_event_count",
+        ])
+    else:
+        groups = df.group_by(
+            ["event_date", "object_id"]
+        ).agg(
+            ["actor_id", "daily_event_count"]
+        ).filter(
+            pl.col("actor_id").list.len() > 1
+        )
+
+    offsets = np.zeros(groups.height + 1, dtype=np.int64)
+    np.cumsum(groups["actor_id"].list.len().to_numpy(), out=offsets[1:])
+    group, first, second = _emit_pair_indices(offsets)
+
+    actor_ids = groups["actor_id"].explode()
+    counts = groups["daily_event_count"].explode()
+
+    actor_pairs = groups.select(["event_date", "object_id"])[group].with_columns([
+        actor_ids.gather(first).alias("actor_id"),
+        actor_ids.gather(second).alias("actor_id_2"),
+        (counts.gather(first) + counts.gather(second)).alias("total_daily_event_count"),
+    ]).filter(
+        pl.col("actor_id") != pl.col("actor_id_2")  # An actor may appear in several rows of a group
     ).select([
         "event_date",
-        "object_id", 
-        "actor_id",
-        "actor_id_2",
-        (pl.col("daily_event_count") + pl.col("daily_event_count_2")).alias("total_daily_event_count")
+        "object_id",
+        pl.min_horizontal("actor_id", "actor_id_2").alias("actor_id"),  # Avoid duplicate pairs (A,B) and (B,A)
+        pl.max_horizontal("actor_id", "actor_id_2").alias("actor_id_2"),
+        "total_daily_event_count",
     ])
 
     return actor_pairs
 
-def prepare_df_to_graph(df: pl.DataFrame, event_type: Optional[str] = None) -> pl.DataFrame:
+def _ordered_codes(values: pl.Series) -> Tuple[pl.Series, pl.Series]:
+    """
+    Intern a column without nulls as UInt32 codes that sort like its values.
+    Comparing the codes gives the same order as comparing the values, so pairs built
+    on the codes keep their actor_id < actor_id_2 orientation once decoded. Any
+    sortable dtype works, e.g., string or integer ids.
+
+    Args:
+        values (pl.Series): The values to intern.
+
+    Returns:
+        Tuple of (codes, categories): categories.gather(codes) gives back the values.
+    """
+    categories = values.unique().sort()
+    # A hash lookup, rather than a binary search of every value in the categories
+    codes = values.replace_strict(categories, pl.int_range(categories.len(), dtype=pl.UInt32, eager=True))
+    return codes, categories
+
+def prepare_df_to_graph(
+    df: Union[pl.DataFrame, pl.LazyFrame],
+    event_type: Optional[str] = None
+) -> pl.DataFrame:
     """
     Process the DataFrame to create a NetworkX graph.
+
+    A LazyFrame, e.g., daily_event_count(scan_csvs_from_dir(...)), is collected only
+    once the event type filter and the columns needed have been applied, so both are
+    pushed down to the scan.
     
     Args:
-        df (pl.DataFrame): Input DataFrame containing the data to process
+        df (pl.DataFrame | pl.LazyFrame): Input DataFrame containing the data to process
+        event_type (str, optional): Filter data by this event type before processing
         
     Returns:
         pl.DataFrame: The processed DataFrame
     """
+    lf = df.lazy()
 
     # Filter by event type if specified
     if event_type is not None:
-        df = df.filter(pl.col("object_type") == event_type)
+        lf = lf.filter(pl.col("object_type") == event_type)
+
+    df = lf.select(
+        ["event_date", "object_id", "actor_id", "daily_event_count"]
+    ).drop_nulls(
+        ["event_date", "object_id", "actor_id"]
+    ).collect(engine="streaming")
+
+    # Pair and aggregate integer codes rather than strings, and decode the actors at the end
+    actor_codes, actors = _ordered_codes(df["actor_id"])
+    df = df.select([
+        "event_date",
+        # Object ids are only a group key, so order-free Categorical codes suffice
+        pl.col("object_id").cast(pl.Utf8).cast(pl.Categorical).to_physical(),
+        actor_codes.alias("actor_id"),
+        "daily_event_count",
+    ])
 
     actor_pairs = _create_actor_pairs_by_date_and_object(df)
 
@@ -201,41 +406,71 @@ def prepare_df_to_graph(df: pl.DataFrame, event_type: Optional[str] = None) -> p
         ["event_date"]
     )
 
-    return actor_pairs
+    return actor_pairs.with_columns([
+        actors.gather(actor_pairs["actor_id"]).alias("actor_id"),
+        actors.gather(actor_pairs["actor_id_2"]).alias("actor_id_2"),
+    ])
+
+def _daily_actor_stats(df: pl.DataFrame) -> pl.DataFrame:
+    """
+    Sum the daily_event_count of each actor per event_date and object_type, sorted by event_date.
+
+    Args:
+        df (pl.DataFrame): DataFrame with event_date, object_type, actor_id and daily_event_count columns
 
-def rolling_window_stats(df: pl.DataFrame, event_type: Optional[str] = None, window_days: int = 30) -> pl.DataFrame:
+    Returns:
+        pl.DataFrame: One row per event_date, object_type and actor_id
+    """
+    # Keeping the order of an input already sorted by date makes the sort below trivial
+    return df.group_by(["event_date", "object_type", "actor_id"], maintain_order=True).agg(
+        pl.col("daily_event_count").sum()
+    ).sort("event_date")
+
+def rolling_window_stats(
+    df: pl.DataFrame,
+    event_type: Optional[str] = None,
+    window_days: int = 30,
+    exact: bool = True
+) -> pl.DataFrame:
     """
     Calculate statistics using a rolling window with a specified number of days.
+
+    Each row covers the window_days calendar days ending on its event_date, so
+    days without events are accounted for rather than skipped. Only windows
+    that lie entirely within the observed date range are returned.
     
     Args:
         df (pl.DataFrame): Input DataFrame containing the data to process
         window_days (int): Size of the rolling window in days
         event_type (str, optional): Filter data by this event type before calculation
+        exact (bool): Count the unique actors exactly. If False, estimate them with HyperLogLog
+            (approx_n_unique), typically within 1-2%, in a fixed amount of memory per window;
+            this only pays off for windows with very many actors.
         
     Returns:
         pl.DataFrame: The DataFrame with rolling window statistics
     """
+    df = _daily_actor_stats(df)
+
     # Filter by event type if specified
     if event_type is not None:
         df = df.filter(pl.col("object_type") == event_type)
-    
-    # Sort by event_date to ensure proper window calculation
-    sorted_df = df.sort("event_date")
-    
-    # Group by date first to get daily stats
-    daily_stats = sorted_df.group_by("event_date").agg(
-        pl.col("actor_id").n_unique().alias("daily_unique_actors"),
-        pl.col("daily_event_count").sum().alias("daily_event_count")
+
+    last_date = df["event_date"].max()
+
+    # One window starting on each day; windows are labelled by their first day
+    rolling_stats = df.group_by_dynamic(
+        "event_date", every="1d", period=f"{window_days}d"
+    ).agg(
+        (pl.col("actor_id").n_unique() if exact else pl.col("actor_id").approx_n_unique()).alias("rolling_unique_actors"),
+        pl.col("daily_event_count").sum().alias("rolling_event_count")
     )
-    
-    # Apply rolling window
-    rolling_stats = daily_stats.select([
-        "event_date",
-        pl.col("daily_unique_actors").rolling_sum(window_size=window_days).alias("rolling_unique_actors"),
-        pl.col("daily_event_count").rolling_sum(window_size=window_days).alias("rolling_event_count")
-    ])
-    
-    return rolling_stats.sort("event_date")
+
+    # Relabel each window by its last day and drop those running past the data. The typed
+    # literal falls back to a null comparison, not a warning, when no rows are left
+    return rolling_stats.with_columns(
+        pl.col("event_date").dt.offset_by(f"{window_days - 1}d")
+    ).filter(pl.col("event_date") <= pl.lit(last_date, dtype=df.schema["event_date"]))
 
 
 
@@ -253,18 +488,48 @@ def create_graphs_by_date(
     """
     graphs_by_date: dict[pl.Date, nx.Graph] = {}
 
-    unique_dates = df.select("event_date").unique().sort("event_date")
-    
-    for date in unique_dates["event_date"]:
-        date_df = df.filter(pl.col("event_date") == date)
-        g: nx.Graph = nx.Graph()
-        for row in date_df.iter_rows():
-            _, actor_id, actor_id_2, total_daily_event_count = row
-            g.add_edge(actor_id, actor_id_2, weight=total_daily_event_count)
-        graphs_by_date[date] = g
+    # Split the DataFrame by date in a single pass instead of filtering it once per date
+    date_dfs = df.partition_by("event_date", as_dict=True)
     
+    for (date,), date_df in sorted(date_dfs.items()):
+        graphs_by_date[date] = _graph_from_edges(date_df)
+
     return graphs_by_date
 
+def _graph_from_edges(df: pl.DataFrame) -> nx.Graph:
+    """
+    Build a weighted NetworkX graph from the actor pairs of a single date.
+
+    Args:
+        df (pl.DataFrame): Rows of prepare_df_to_graph for one event_date.
+
+    Returns:
+        nx.Graph: The graph of actors, weighted by total_daily_event_count.
+    """
+    g: nx.Graph = nx.Graph()
+    g.add_weighted_edges_from(zip(
+        df["actor_id"].to_list(),
+        df["actor_id_2"].to_list(),
+        df["total_daily_event_count"].to_list()
+    ))
+    return g
+
+def _count_supernodes(values: np.ndarray) -> int:
+    """
+    Count the values greater than their mean plus two (sample) standard deviations.
+    
+    Args:
+        values (np.ndarray): A centrality value per node.
+        
+    Returns:
+        int: The number of supernodes, 0 for fewer than two nodes.
+    """
+    if values.size < 2:  # The sample standard deviation is undefined
+        return 0
+
+    threshold = values.mean() + 2 * values.std(ddof=1)
+    return int((values > threshold).sum())
+
 def count_supernodes_by_degree(graph: nx.Graph) -> int:
     """
     Count the number of supernodes in a graph based on node degree.
@@ -275,51 +540,52 @@ def count_supernodes_by_degree(graph: nx.Graph) -> int:
     Returns:
         int: The number of supernodes (nodes with degree greater than mean + 2*std).
     """
-    df = pl.DataFrame(
-        list(graph.degree()),
-        schema=[("node", pl.Utf8), ("degree", pl.Int64)],
-        strict=False,
-        orient="row"
-    )
-    stats = df.select([
-        pl.col("degree").mean().alias("mean"),
-        pl.col("degree").std().alias("std")
-    ]).row(0)
+    degrees = np.fromiter((d for _, d in graph.degree()), dtype=np.int64, count=graph.number_of_nodes())
+    return _count_supernodes(degrees)
 
-    threshold = stats[0] + 2 * stats[1]
-    return df.filter(pl.col("degree") > threshold).height
 
+def _to_igraph(G: nx.Graph) -> ig.Graph:
+    """
+    Convert an undirected NetworkX graph into an igraph graph with the same nodes and edges.
+    Node and edge attributes are not copied.
+    
+    Args:
+        G (nx.Graph): The graph to convert.
+        
+    Returns:
+        ig.Graph: The igraph graph, with vertices in the order of G.nodes().
+    """
+    index = {node: i for i, node in enumerate(G.nodes())}
+    return ig.Graph(n=len(index), edges=[(index[u], index[v]) for u, v in G.edges()])
 
 def count_supernodes_by_betweenness(G: nx.Graph) -> int:
-    betweenness = nx.betweenness_centrality(G)
-    df = pl.DataFrame({
-        "node": list(betweenness.keys()),
-        "betweenness": list(betweenness.values())
-    })
-
-    stats = df.select([
-        pl.col("betweenness").mean().alias("mean"),
-        pl.col("betweenness").std().alias("std")
-    ]).row(0)
-
-    threshold = stats[0] + 2 * stats[1]
-    return df.filter(pl.col("betweenness") > threshold).height
+    """
+    Count the number of supernodes in a graph based on betweenness centrality.
+    Betweenness is computed by igraph; since the threshold is relative to the mean,
+    the count does not depend on normalization.
+    
+    Args:
+        G (nx.Graph): The graph to analyze.
+        
+    Returns:
+        int: The number of supernodes (nodes with betweenness greater than mean + 2*std).
+    """
+    betweenness = np.asarray(_to_igraph(G).betweenness(), dtype=np.float64)
+    return _count_supernodes(betweenness)
 
 
 def count_supernodes_by_eigenvector(G: nx.Graph) -> int:
+    """
+    Count the number of supernodes in a graph based on eigenvector centrality.
+    
+    Args:
+        G (nx.Graph): The graph to analyze.
+        
+    Returns:
+        int: The number of supernodes (nodes with eigenvector centrality greater than mean + 2*std).
+    """
     eigen = nx.eigenvector_centrality(G, max_iter=1000)
-    df = pl.DataFrame({
-        "node": list(eigen.keys()),
-        "eigenvector": list(eigen.values())
-    })
-
-    stats = df.select([
-        pl.col("eigenvector").mean().alias("mean"),
-        pl.col("eigenvector").std().alias("std")
-    ]).row(0)
-
-    threshold = stats[0] + 2 * stats[1]
-    return df.filter(pl.col("eigenvector") > threshold).height
+    return _count_supernodes(np.fromiter(eigen.values(), dtype=np.float64, count=len(eigen)))
 
 #number of connected components
 def count_connected_components(G: nx.Graph) -> int:
@@ -344,57 +610,264 @@ def calculate_graph_metrics(graph: nx.Graph) -> dict:
     Returns:
         dict: A dictionary containing the calculated metrics.
     """
-    metrics = {
-        "number_of_nodes": graph.number_of_nodes(),
-        "number_of_edges": graph.number_of_edges(),
-        "average_clustering": nx.average_clustering(graph),
-        "density": nx.density(graph),
-        "average_degree": sum(dict(graph.degree()).values()) / graph.number_of_nodes() if graph.number_of_nodes() > 0 else 0,
-        "number_of_isolated_nodes": sum(1 for node, degree in dict(graph.degree()).items() if degree == 0),
-        "number_of_connected_components":  nx.number_connected_components(graph),
-        "number_of_supernodes_by_degree": count_supernodes_by_degree(graph),
-        "number_of_supernodes_by_betweenness": count_supernodes_by_betweenness(graph),
-        #"number_of_supernodes_by_eigenvector": count_supernodes_by_eigenvector(graph),
-        "average_shortest_path_length": nx.average_shortest_path_length(graph) if nx.is_connected(graph) else float('inf'),
-        "diameter": nx.diameter(graph) if nx.is_connected(graph) else float('inf'),
+    # The computations run in igraph's C core
+    return _igraph_metrics(_to_igraph(graph))
+
+def _igraph_metrics(graph: ig.Graph) -> dict:
+    """
+    Calculate the metrics of calculate_graph_metrics for an undirected igraph graph.
+    
+    Args:
+        graph (ig.Graph): The graph to analyze.
+        
+    Returns:
+        dict: A dictionary containing the calculated metrics.
+    """
+    number_of_nodes = graph.vcount()
+    number_of_edges = graph.ecount()
+    degrees = np.asarray(graph.degree(), dtype=np.int64)
+
+    # Clustering is 0 without any possible triangle and 1 for a complete simple graph
+    if number_of_nodes < 3 or number_of_edges == 0:
+        average_clustering = 0.0
+    elif number_of_edges == number_of_nodes * (number_of_nodes - 1) // 2 and graph.is_simple():
+        average_clustering = 1.0
+    else:
+        average_clustering = graph.transitivity_avglocal_undirected(mode="zero")
+
+    number_of_connected_components = len(graph.connected_components())
+    if number_of_connected_components == 1:
+        # igraph returns nan rather than 0 for the path length of a single node
+        average_shortest_path_length = graph.average_path_length() if number_of_nodes > 1 else 0.0
+        diameter = float(graph.diameter())
+    else:
+        average_shortest_path_length = diameter = float('inf')
+
+    return {
+        "number_of_nodes": number_of_nodes,
+        "number_of_edges": number_of_edges,
+        "average_clustering": average_clustering,
+        "density": 2 * number_of_edges / (number_of_nodes * (number_of_nodes - 1)) if number_of_nodes > 1 else 0.0,
+        "average_degree": 2 * number_of_edges / number_of_nodes if number_of_nodes > 0 else 0.0,
+        "number_of_isolated_nodes": int((degrees == 0).sum()),
+        "number_of_connected_components": number_of_connected_components,
+        "number_of_supernodes_by_degree": _count_supernodes(degrees),
+        "number_of_supernodes_by_betweenness": _count_supernodes(np.asarray(graph.betweenness(), dtype=np.float64)),
+        #"number_of_supernodes_by_eigenvector": _count_supernodes(np.asarray(graph.eigenvector_centrality(), dtype=np.float64)),
+        "average_shortest_path_length": average_shortest_path_length,
+        "diameter": diameter,
     }
-    return metrics
 
 def graphs_metrics_to_dataframe(
     graphs_by_date: dict[pl.Date, nx.Graph],
-    smoothing_period_days: int = 0
+    smoothing_period_days: int = 0,
+    n_jobs: int = -1
 ) -> pl.DataFrame:
     """
     Convert a dictionary of graphs by date into a Polars DataFrame with graph metrics.
     Optionally smooth metrics using a rolling average over the specified period (in days).
+    The graphs are measured in parallel worker processes, unless n_jobs is 1.
     
     Args:
         graphs_by_date (dict[str, nx.Graph]): Dictionary mapping dates to their corresponding graphs.
         smoothing_period_days (int, optional): Number of days for rolling average smoothing. Default is 0 (no smoothing).
+        n_jobs (int): Number of worker processes, -1 to use all CPU cores.
         
     Returns:
         pl.DataFrame: A DataFrame with dates and graph metrics as columns.
     """
+    if n_jobs == 1:
+        results = [calculate_graph_metrics(graph) for graph in graphs_by_date.values()]
+    else:
+        # Plain node and edge lists pickle much faster than the graphs themselves
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(_graph_metrics_from_edges)(list(graph.nodes()), list(graph.edges()))
+            for graph in graphs_by_date.values()
+        )
+
     metrics_list = []
 
-    for date, graph in graphs_by_date.items():
-        metrics = calculate_graph_metrics(graph)
+    for date, metrics in zip(graphs_by_date.keys(), results):
         metrics["event_date"] = date
         metrics_list.append(metrics)
 
-    df = pl.DataFrame(metrics_list).sort("event_date")
+    return _metrics_to_dataframe(metrics_list, smoothing_period_days)
+
+def _graph_metrics_from_edges(nodes: list, edges: List[tuple]) -> dict:
+    """
+    Rebuild a graph from its nodes and edges and calculate its metrics.
+    Edge weights are not needed, as none of the metrics use them.
+    
+    Args:
+        nodes (list): The nodes of the graph, isolated ones included.
+        edges (List[tuple]): The (u, v) edges of the graph.
+        
+    Returns:
+        dict: The metrics of calculate_graph_metrics.
+    """
+    graph: nx.Graph = nx.Graph()
+    graph.add_nodes_from(nodes)
+    graph.add_edges_from(edges)
+    return calculate_graph_metrics(graph)
+
+def _graph_metrics_from_codes(date: pl.Date, first: np.ndarray, second: np.ndarray) -> dict:
+    """
+    Build the igraph graph of a single date from its edges and calculate its metrics.
+    
+    Args:
+        date (pl.Date): The event_date of the edges.
+        first (np.ndarray): Integer code of the first actor of each edge.
+        second (np.ndarray): Integer code of the second actor of each edge.
+        
+    Returns:
+        dict: The metrics of calculate_graph_metrics, plus the event_date.
+    """
+    # Renumber the actors of this date as vertices 0..n-1
+    actors, vertices = np.unique(np.concatenate([first, second]), return_inverse=True)
+    edges = vertices.reshape(2, -1).T.tolist()
+    metrics = _igraph_metrics(ig.Graph(n=actors.shape[0], edges=edges))
+    metrics["event_date"] = date
+    return metrics
+
+def graph_metrics_by_date(
+    df: pl.DataFrame,
+    smoothing_period_days: int = 0,
+    n_jobs: int = -1
+) -> pl.DataFrame:
+    """
+    Calculate the graph metrics of every date directly from the output of prepare_df_to_graph.
+    Equivalent to graphs_metrics_to_dataframe(create_graphs_by_date(df)), but no NetworkX
+    graphs are built: the actors of all dates are encoded as integers once, and the
+    graph of each date is built in igraph and measured in a worker process.
+
+    Args:
+        df (pl.DataFrame): Input DataFrame containing graph data
+        smoothing_period_days (int, optional): Number of days for rolling average smoothing. Default is 0 (no smoothing).
+        n_jobs (int): Number of worker processes, -1 to use all CPU cores.
+
+    Returns:
+        pl.DataFrame: A DataFrame with dates and graph metrics as columns.
+    """
+    # A single encoding shared by both actor columns
+    codes = pl.concat([df["actor_id"], df["actor_id_2"]]).cast(pl.Utf8).cast(pl.Categorical).to_physical()
+    edges = pl.DataFrame({
+        "event_date": df["event_date"],
+        "first": codes[:df.height],
+        "second": codes[df.height:],
+    })
+
+    date_dfs = edges.partition_by("event_date", as_dict=True)
+    metrics_list = Parallel(n_jobs=n_jobs)(
+        delayed(_graph_metrics_from_codes)(date, date_df["first"].to_numpy(), date_df["second"].to_numpy())
+        for (date,), date_df in date_dfs.items()
+    )
+
+    return _metrics_to_dataframe(metrics_list, smoothing_period_days)
+
+def _metrics_to_dataframe(metrics_list: List[dict], smoothing_period_days: int) -> pl.DataFrame:
+    """
+    Collect per-date metrics into a DataFrame sorted by date, optionally smoothed.
+
+    Args:
+        metrics_list (List[dict]): The metrics of each date, including its event_date.
+        smoothing_period_days (int): Number of days for rolling average smoothing, 0 or 1 for none.
+
+    Returns:
+        pl.DataFrame: A DataFrame with dates and graph metrics as columns.
+    """
+    # Build each column directly rather than inferring the schema row by row. Every metric
+    # of _igraph_metrics has a fixed Python type, and event_date keeps the type of the keys
+    columns = metrics_list[0].keys() if metrics_list else ["event_date"]
+    df = pl.DataFrame(
+        {col: [metrics[col] for metrics in metrics_list] for col in columns}
+    ).sort("event_date")
 
     if smoothing_period_days > 1:
         metric_cols = [col for col in df.columns if col != "event_date"]
-        for col in metric_cols:
-            df = df.with_columns(
-                pl.col(col)
-                .rolling_mean(window_size=smoothing_period_days, min_samples=1)
-                .alias(col)
-            )
+        df = df.with_columns(
+            pl.col(metric_cols)
+            .rolling_mean(window_size=smoothing_period_days, min_samples=1)
+        )
 
     return df
 
+def _float_arrays(df: pl.DataFrame, columns: list[str]) -> dict[str, np.ndarray]:
+    """
+    Convert the given columns to contiguous float64 NumPy arrays, once per column,
+    as expected by _distance_correlation.
+
+    Args:
+        df (pl.DataFrame): Input DataFrame.
+        columns (list[str]): Names of the numeric columns to convert.
+
+    Returns:
+        dict[str, np.ndarray]: Mapping from column name to its values.
+    """
+    return {col: np.ascontiguousarray(df[col].cast(pl.Float64).to_numpy()) for col in columns}
+
+# Fast-math flags that allow vectorizing the reductions but, unlike fastmath=True,
+# keep the inf/nan semantics: metrics such as the diameter are inf for disconnected graphs.
+_DCOR_FASTMATH = {"reassoc", "contract", "arcp", "nsz"}
+
+@njit(parallel=True, fastmath=_DCOR_FASTMATH, cache=True)
+def _distance_correlation(x: np.ndarray, y: np.ndarray) -> float:
+    """
+    Compute the (biased) distance correlation between two 1-D series, the same
+    estimator as dcor.distance_correlation.
+
+    The double-centered distance matrices are never stored: a single pass over all
+    pairs (i, j) accumulates the row sums of |x_i - x_j| and |y_i - y_j| and the sums
+    of their products, from which the distance covariance and variances follow as
+    mean(a*b) + mean(a)*mean(b) - 2*mean(row_mean(a)*row_mean(b)).
+
+    Args:
+        x (np.ndarray): The first series, float64.
+        y (np.ndarray): The second series, float64, of the same length.
+
+    Returns:
+        float: The distance correlation, nan if any value is inf or nan.
+    """
+    n = x.shape[0]
+    row_a = np.empty(n)
+    row_b = np.empty(n)
+    sum_ab = 0.0
+    sum_aa = 0.0
+    sum_bb = 0.0
+    for i in prange(n):
+        ra = 0.0
+        rb = 0.0
+        ab = 0.0
+        aa = 0.0
+        bb = 0.0
+        for j in range(n):
+            a = abs(x[i] - x[j])
+            b = abs(y[i] - y[j])
+            ra += a
+            rb += b
+            ab += a * b
+            aa += a * a
+            bb += b * b
+        row_a[i] = ra / n
+        row_b[i] = rb / n
+        sum_ab += ab
+        sum_aa += aa
+        sum_bb += bb
+
+    n2 = n * n
+    mean_a = row_a.sum() / n
+    mean_b = row_b.sum() / n
+    dcov_xy = sum_ab / n2 + mean_a * mean_b - 2.0 * (row_a * row_b).sum() / n
+    dvar_x = sum_aa / n2 + mean_a * mean_a - 2.0 * (row_a * row_a).sum() / n
+    dvar_y = sum_bb / n2 + mean_b * mean_b - 2.0 * (row_b * row_b).sum() / n
+
+    denominator = np.sqrt(dvar_x * dvar_y)
+    if denominator == 0.0:
+        return 0.0
+    dcor_sqr = dcov_xy / denominator
+    if dcor_sqr < 0.0:  # Rounding error around independence
+        dcor_sqr = 0.0
+    return np.sqrt(dcor_sqr)
+
 def distance_correlation_with_column(df: pl.DataFrame, target_col: str) -> pl.DataFrame:
     """
     Compute non-lagged distance correlation between a specified column and all other numeric columns,
@@ -412,12 +885,12 @@ def distance_correlation_with_column(df: pl.DataFrame, target_col: str) -> pl.Da
         raise ValueError(f"Column '{target_col}' is not numeric or not found in DataFrame.")
 
     records = []
-    x_np = df[target_col].to_numpy()
+    arrays = _float_arrays(df, numeric_cols)
+    x_np = arrays[target_col]
     for col in numeric_cols:
         if col == target_col:
             continue
-        y_np = df[col].to_numpy()
-        d = dcor.distance_correlation(x_np, y_np)
+        d = _distance_correlation(x_np, arrays[col])
         records.append((target_col, col, d))
 
     return pl.DataFrame(records, schema=["col_x", "col_y", "dcor"])
@@ -431,13 +904,12 @@ def distance_correlation_dataframe(df: pl.DataFrame) -> pl.DataFrame:
     """
     numeric_cols = [col for col, dtype in zip(df.columns, df.dtypes) if dtype.is_numeric()]
     records = []
+    arrays = _float_arrays(df, numeric_cols)
 
     for i in range(len(numeric_cols)):
         for j in range(i + 1, len(numeric_cols)):
             col_x, col_y = numeric_cols[i], numeric_cols[j]
-            x_np = df[col_x].to_numpy()
-            y_np = df[col_y].to_numpy()
-            d = dcor.distance_correlation(x_np, y_np)
+            d = _distance_correlation(arrays[col_x], arrays[col_y])
             records.append((col_x, col_y, d))
             records.append((col_y, col_x, d))  # symmetric
 
@@ -446,50 +918,71 @@ def distance_correlation_dataframe(df: pl.DataFrame) -> pl.DataFrame:
 
     return pl.DataFrame(records, schema=["col_x", "col_y", "dcor"])
 
+def _lagged_distance_correlation(
+    x_np: np.ndarray,
+    y_np: np.ndarray,
+    max_lag: int
+) -> List[Tuple[int, float]]:
+    """
+    Compute the distance correlation between two series for every lag in [-max_lag, max_lag].
+
+    Parameters:
+        x_np (np.ndarray): The first series.
+        y_np (np.ndarray): The second series.
+        max_lag (int): The maximum lag (positive and negative) to evaluate.
+
+    Returns:
+        List of (lag, distance_correlation)
+    """
+    pair_results = []
+    for lag in range(-max_lag, max_lag + 1):
+        if lag < 0:
+            d = _distance_correlation(x_np[:lag], y_np[-lag:])
+        elif lag > 0:
+            d = _distance_correlation(x_np[lag:], y_np[:-lag])
+        else:
+            d = _distance_correlation(x_np, y_np)
+        pair_results.append((lag, d))
+    return pair_results
+
 def lagged_distance_correlation_all_pairs(
     df: pl.DataFrame,
-    max_lag: int = 20
+    max_lag: int = 20,
+    n_jobs: int = -1
 ) -> Dict[Tuple[str, str], List[Tuple[int, float]]]:
     """
     Compute lagged distance correlation for all unique pairs of numeric columns in a Polars DataFrame.
+    Pairs are processed in parallel worker processes.
 
     Parameters:
         df (pl.DataFrame): The input DataFrame.
         max_lag (int): The maximum lag (positive and negative) to evaluate.
+        n_jobs (int): Number of worker processes, -1 to use all CPU cores.
 
     Returns:
         Dictionary mapping (col_x, col_y) -> list of (lag, distance_correlation)
     """
     numeric_columns = [col for col, dtype in zip(df.columns, df.dtypes) if dtype.is_numeric()]
-    results = {}
-
-    for i in range(len(numeric_columns)):
-        for j in range(i + 1, len(numeric_columns)):
-            col_x = numeric_columns[i]
-            col_y = numeric_columns[j]
-
-            x_np = df[col_x].to_numpy()
-            y_np = df[col_y].to_numpy()
+    arrays = _float_arrays(df, numeric_columns)
 
-            pair_results = []
-            for lag in range(-max_lag, max_lag + 1):
-                if lag < 0:
-                    d = dcor.distance_correlation(x_np[:lag], y_np[-lag:])
-                elif lag > 0:
-                    d = dcor.distance_correlation(x_np[lag:], y_np[:-lag])
-                else:
-                    d = dcor.distance_correlation(x_np, y_np)
-                pair_results.append((lag, d))
-
-            results[(col_x, col_y)] = pair_results
+    pairs = [
+        (numeric_columns[i], numeric_columns[j])
+        for i in range(len(numeric_columns))
+        for j in range(i + 1, len(numeric_columns))
+    ]
+    pair_results = Parallel(n_jobs=n_jobs)(
+        delayed(_lagged_distance_correlation)(arrays[col_x], arrays[col_y], max_lag)
+        for col_x, col_y in pairs
+    )
 
-    return results
+    return dict(zip(pairs, pair_results))
 
 from typing import Dict, Tuple, List
 
 def best_lagged_distance_correlation_per_pair(
     df: pl.DataFrame,
-    max_lag: int = 20
+    max_lag: int = 20,
+    n_jobs: int = -1
 ) -> Dict[Tuple[str, str], Tuple[int, float]]:
     """
     Compute the best (maximum) lagged distance correlation for all unique column pairs.
@@ -497,11 +990,12 @@ def best_lagged_distance_correlation_per_pair(
     Parameters:
         df (pl.DataFrame): Input Polars DataFrame.
         max_lag (int): Max lag (positive and negative) to consider.
+        n_jobs (int): Number of worker processes, -1 to use all CPU cores.
 
     Returns:
         Dictionary mapping (col_x, col_y) -> (best_lag, max_distance_correlation)
     """
-    all_lagged_results = lagged_distance_correlation_all_pairs(df, max_lag=max_lag)
+    all_lagged_results = lagged_distance_correlation_all_pairs(df, max_lag=max_lag, n_jobs=n_jobs)
 
     best_results = {
         pair: max(lagged_corrs, key=lambda t: t[1])  # choose lag with highest dCor